@@ -0,0 +1,63 @@
+import logging
+from src.packages.managers.storage_manager import AzureStorageManager
+import azure.functions as func
+import json
+
+
+def main(req: func.HttpRequest) -> func.HttpResponse:
+    logging.info('Exporting session images as a ZIP archive.')
+
+    try:
+
+        # Parse request body
+        req_body = req.get_json()
+        session_id = req_body.get("session_id")
+        refresh = req_body.get("refresh", False)
+        redirect = req_body.get("redirect", False)
+
+        container_name = "poc-generated-selfi"
+        storage_manager = AzureStorageManager()
+
+        # Validate input parameters
+        if not session_id:
+            return func.HttpResponse(json.dumps({"status": "400 Bad Request", "message": "No session_id provided."}), status_code=400)
+
+        session_prefix = f"{session_id}/"
+        archive_blob = f"{storage_manager.config.config_storage_export_prefix}/{session_id}.zip"
+
+        session_blobs = storage_manager.list_blob_properties(container_name, name_starts_with=session_prefix)
+        if not session_blobs:
+            return func.HttpResponse(json.dumps({"status": "404 Not Found", "message": "No images found for the session."}), status_code=404)
+
+        # Reuse the cached archive unless an image was added or replaced after it was built
+        cached = [blob for blob in storage_manager.list_blob_properties(container_name, name_starts_with=archive_blob) if blob["name"] == archive_blob]
+        is_fresh = cached and cached[0]["last_modified"] >= max(blob["last_modified"] for blob in session_blobs)
+
+        if refresh or not is_fresh:
+            # The archive is streamed from the source blobs into the cached blob block by block
+            archive_chunks = storage_manager.iter_zip(container_name, [blob["name"] for blob in session_blobs], strip_prefix=session_prefix)
+            storage_manager.upload_blob(container_name, archive_blob, archive_chunks, content_type="application/zip")
+            logging.info(f"Stored archive of {len(session_blobs)} images at blob: {archive_blob}")
+
+        archive_url = storage_manager.get_blob_url_with_sas(container_name, archive_blob)
+
+        if redirect:
+            return func.HttpResponse(status_code=302, headers={"Location": archive_url})
+
+        response = {
+            "status": "200 OK",
+            "url": archive_url,
+            "count": len(session_blobs)
+        }
+
+        return func.HttpResponse(
+                body=json.dumps(response),
+                mimetype="application/json",
+                status_code=200
+            )
+
+    except ValueError as e:
+        return func.HttpResponse(json.dumps({"status": "400 Bad Request", "message": str(e)}), status_code=400)
+    except Exception as e:
+        logging.error(f"Error exporting session: {str(e)}")
+        return func.HttpResponse(json.dumps({"status": "500 Internal Server Error", "message": "Internal server error."}), status_code=500)
@@ -1,24 +1,27 @@
 import azure.functions as func
-import json
 import logging
+from src.packages.config.filter_catalog import get_filter_catalog
 
 def main(req: func.HttpRequest) -> func.HttpResponse:
-    # Define available filters with name, description, and status
-    filters = [
-        {"name": "FunkoMe", "description": "Creates a Funko-style version", "status": True},
-        {"name": "SnapHero", "description": "Transform the photo into a vibrant superhero character", "status": True},
-        {"name": "MyPixar", "description": "Pixar-style animated filter", "status": True},
+    # Filters are loaded once per worker from the filter catalog
+    catalog = get_filter_catalog()
 
-    ]
-    
-    response = {
-        "filters": filters
+    headers = {
+        "ETag": catalog.etag,
+        "Cache-Control": f"public, max-age={catalog.max_age}"
     }
 
-    logging.info(json.dumps(response))
-    
+    # The client already holds the current catalog, If-None-Match uses weak comparison
+    if_none_match = req.headers.get("If-None-Match", "")
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    if catalog.etag in tags or if_none_match.strip() == "*":
+        logging.info("Filter catalog not modified.")
+        return func.HttpResponse(status_code=304, headers=headers)
+
     # Return JSON response
     return func.HttpResponse(
-        json.dumps(response),
-        status_code=200
-    )
\ No newline at end of file
+        catalog.response_body,
+        status_code=200,
+        mimetype="application/json",
+        headers=headers
+    )
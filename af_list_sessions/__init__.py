@@ -8,7 +8,9 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
 
     storage_manager = AzureStorageManager()
 
-    mortgages_list = storage_manager.list_blobs_with_metadata(container_name = "poc-input-selfi")
+    # Skip the downscaled derivatives stored next to the uploads
+    vision_prefix = storage_manager.config.config_vision_prefix + "/"
+    mortgages_list = storage_manager.list_blobs_with_metadata(container_name = "poc-input-selfi", exclude_prefix = vision_prefix)
 
     response_body = json.dumps(mortgages_list)
 
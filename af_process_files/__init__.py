@@ -5,6 +5,7 @@ import azure.functions as func
 from azure.core.exceptions import ResourceNotFoundError
 from src.packages.managers.ai_managers.ai_manager import AIManager
 from src.packages.managers.storage_manager import AzureStorageManager
+from src.packages.managers.image_processing_manager import ImageProcessingManager
 
 
 def main(req: func.HttpRequest) -> func.HttpResponse:
@@ -18,11 +19,13 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
         session_id = req_body.get('session_id')
         blob_filename = req_body.get('stored_img')
         filters = req_body.get('filters')
+        vision_detail = req_body.get('detail')
 
         # Initialize AIManager
         ai_manager = AIManager()
         image_generation_manager = ai_manager.image_generation_manager
         storage_manager = AzureStorageManager()
+        image_processing_manager = ImageProcessingManager(storage_manager)
 
         # Validate input parameters
         if not session_id:
@@ -33,13 +36,17 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
 
         if not filters:
             return func.HttpResponse("No filters provided.", status_code=400)
+
+        if vision_detail is not None and vision_detail not in ("low", "high", "auto"):
+            return func.HttpResponse(json.dumps({"status": "400 Bad Request", "message": "detail must be 'low', 'high' or 'auto'."}), status_code=400)
       
-        # Generate the image URL from Blob Storage using StorageManager
-        blob_image_url = storage_manager.get_blob_url_with_sas(container_name, blob_filename)
+        # Downscale the upload and generate its URL from Blob Storage using StorageManager
+        vision_blob = image_processing_manager.get_vision_blob(container_name, blob_filename)
+        blob_image_url = storage_manager.get_blob_url_with_sas(container_name, vision_blob)
         logging.info(f"Blob image URL with SAS: {blob_image_url}")
         
         # Generate description using GPT-4o from ImageGenerationManager
-        image_description = image_generation_manager.generate_image_description(blob_image_url)
+        image_description = image_generation_manager.generate_image_description(blob_image_url, vision_detail)
         logging.info(f"Image description of input image: {image_description}")
 
         generated_images = {}
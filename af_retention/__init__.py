@@ -0,0 +1,67 @@
+import logging
+import json
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+import azure.functions as func
+from src.packages.managers.storage_manager import AzureStorageManager
+
+
+def session_of(blob_name: str, prefixes: list) -> str:
+    """
+    Returns the session id a blob belongs to. Uploads are named '{session_id}.{ext}',
+    generated images '{session_id}/...' and derivatives '{prefix}/{session_id}.{ext}'.
+    """
+    for prefix in prefixes:
+        if blob_name.startswith(prefix + "/"):
+            return blob_name[len(prefix) + 1:].rsplit(".", 1)[0]
+    if "/" in blob_name:
+        return blob_name.split("/", 1)[0]
+    return blob_name.rsplit(".", 1)[0]
+
+
+def purge_expired_sessions(storage_manager: AzureStorageManager, now: datetime = None) -> dict:
+    """
+    Deletes the blobs of every session whose newest blob is older than the retention period
+    and returns how many sessions, blobs and bytes were reclaimed.
+    """
+    config = storage_manager.config
+
+    containers = [config.config_storage_account_ip_container, config.config_storage_account_op_container]
+    prefixes = [config.config_vision_prefix, config.config_storage_export_prefix]
+    cutoff = (now or datetime.now(timezone.utc)) - timedelta(days=config.config_retention_days)
+
+    # Group the blobs of both containers by session, a session lives as long as its newest blob
+    session_blobs = defaultdict(list)
+    session_last_modified = {}
+    for container_name in containers:
+        for blob in storage_manager.list_blob_properties(container_name):
+            session_id = session_of(blob["name"], prefixes)
+            session_blobs[session_id].append((container_name, blob))
+            session_last_modified[session_id] = max(session_last_modified.get(session_id, blob["last_modified"]), blob["last_modified"])
+
+    expired_sessions = [session_id for session_id, last_modified in session_last_modified.items() if last_modified < cutoff]
+
+    summary = {"sessions": len(expired_sessions), "blobs": 0, "bytes": 0}
+
+    for container_name in containers:
+        sizes = {
+            blob["name"]: blob["size"]
+            for session_id in expired_sessions
+            for blob_container, blob in session_blobs[session_id]
+            if blob_container == container_name
+        }
+        deleted = storage_manager.delete_blobs(container_name, list(sizes))
+        summary["blobs"] += len(deleted)
+        summary["bytes"] += sum(sizes[blob] for blob in deleted)
+        logging.info(f"Deleted {len(deleted)} of {len(sizes)} expired blobs from {container_name}")
+
+    return summary
+
+
+def main(timer: func.TimerRequest) -> None:
+    logging.info('Running retention of expired sessions.')
+
+    summary = purge_expired_sessions(AzureStorageManager())
+
+    # af_list_sessions reads the input container directly, so there is no separate index to rebuild
+    logging.info(f"Retention summary: {json.dumps(summary)}")
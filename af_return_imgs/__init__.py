@@ -0,0 +1,91 @@
+import logging
+from src.packages.managers.storage_manager import AzureStorageManager
+import azure.functions as func
+import base64
+import json
+
+
+def main(req: func.HttpRequest) -> func.HttpResponse:
+    logging.info('Returning generated images in batch.')
+
+    try:
+
+        # Parse request body
+        req_body = req.get_json()
+        image_ids = req_body.get("image_ids")
+        session_id = req_body.get("session_id")
+        response_format = req_body.get("format", "sas")
+        max_concurrency = req_body.get("max_concurrency")
+
+        container_name = "poc-generated-selfi"
+        storage_manager = AzureStorageManager()
+
+        # Validate input parameters
+        if not image_ids and not session_id:
+            return func.HttpResponse(json.dumps({"status": "400 Bad Request", "message": "No image_ids or session_id provided."}), status_code=400)
+
+        max_batch_size = storage_manager.config.config_storage_max_batch_size
+        if image_ids and (not isinstance(image_ids, list) or not all(isinstance(image_id, str) for image_id in image_ids)):
+            return func.HttpResponse(json.dumps({"status": "400 Bad Request", "message": "image_ids must be a list of strings."}), status_code=400)
+
+        if image_ids and len(image_ids) > max_batch_size:
+            return func.HttpResponse(json.dumps({"status": "400 Bad Request", "message": f"image_ids accepts at most {max_batch_size} ids."}), status_code=400)
+
+        if max_concurrency is not None:
+            try:
+                if isinstance(max_concurrency, bool):
+                    raise ValueError
+                max_concurrency = int(max_concurrency)
+                if max_concurrency < 1:
+                    raise ValueError
+            except (TypeError, ValueError):
+                return func.HttpResponse(json.dumps({"status": "400 Bad Request", "message": "max_concurrency must be a positive integer."}), status_code=400)
+
+        if response_format not in ("sas", "base64"):
+            return func.HttpResponse(json.dumps({"status": "400 Bad Request", "message": "format must be 'sas' or 'base64'."}), status_code=400)
+
+        # Every output of a session is stored under its own folder
+        listed = not image_ids
+        if listed:
+            image_ids = storage_manager.list_blobs(container_name, name_starts_with=f"{session_id}/")
+
+        files = {}
+
+        if response_format == "base64":
+            results = storage_manager.get_blobs(container_name, image_ids, fmt="img", max_concurrency=max_concurrency)
+            for image_id, result in results.items():
+                if isinstance(result, Exception):
+                    files[image_id] = {"error": str(result)}
+                else:
+                    img_base64 = base64.b64encode(result.read()).decode('utf-8')
+                    files[image_id] = {"base64_img": "data:image/png;base64," + img_base64}
+        else:
+            # Listed blobs are known to exist, explicit ids are checked before signing
+            if listed:
+                results = dict.fromkeys(image_ids, True)
+            else:
+                results = storage_manager.check_blobs(container_name, image_ids, max_concurrency=max_concurrency)
+            for image_id, result in results.items():
+                if isinstance(result, Exception):
+                    files[image_id] = {"error": str(result)}
+                elif not result:
+                    files[image_id] = {"error": "Blob not found."}
+                else:
+                    files[image_id] = {"url": storage_manager.get_blob_url_with_sas(container_name, image_id)}
+
+        response = {
+            "status": "200 OK",
+            "files": files
+        }
+
+        return func.HttpResponse(
+                body=json.dumps(response),
+                mimetype="application/json",
+                status_code=200
+            )
+
+    except ValueError as e:
+        return func.HttpResponse(json.dumps({"status": "400 Bad Request", "message": str(e)}), status_code=400)
+    except Exception as e:
+        logging.error(f"Error returning images: {str(e)}")
+        return func.HttpResponse(json.dumps({"status": "500 Internal Server Error", "message": "Internal server error."}), status_code=500)
@@ -0,0 +1,132 @@
+"""
+Compares the original upload against its preprocessed derivative as GPT-4o vision input.
+
+Offline mode measures preprocessing time, payload size and the estimated vision token cost
+of local images:
+
+    python -m benchmarks.benchmark_vision_preprocessing photo1.jpg photo2.jpg
+
+Live mode also calls GPT-4o with both versions of an upload stored in `poc-input-selfi`
+and reports latency and the two descriptions side by side:
+
+    python -m benchmarks.benchmark_vision_preprocessing --blob <session_id>.png --runs 3
+"""
+
+import argparse
+import math
+import statistics
+import time
+from io import BytesIO
+from PIL import Image, ImageOps
+from src.packages.managers.image_processing_manager import ImageProcessingManager
+
+
+def estimate_vision_tokens(width: int, height: int, detail: str) -> int:
+    """
+    Estimates the GPT-4o input tokens of an image following the published tiling rules.
+
+    Parameters
+    ----------
+    width : int
+        Width in pixels of the image.
+    height : int
+        Height in pixels of the image.
+    detail : str
+        Vision detail level: 'low', 'high' or 'auto'.
+
+    Returns
+    -------
+    int
+        Estimated number of tokens.
+    """
+    if detail == "low":
+        return 85
+
+    # Fit in 2048x2048, then scale the shortest side down to 768
+    scale = min(1.0, 2048 / max(width, height))
+    width, height = width * scale, height * scale
+    scale = min(1.0, 768 / min(width, height))
+    width, height = width * scale, height * scale
+
+    tiles = math.ceil(width / 512) * math.ceil(height / 512)
+    return 85 + 170 * tiles
+
+
+def image_stats(data: bytes) -> dict:
+    """
+    Returns the upright size in pixels and the payload size of an encoded image.
+    """
+    image = ImageOps.exif_transpose(Image.open(BytesIO(data)))
+    return {"width": image.width, "height": image.height, "bytes": len(data)}
+
+
+def run_offline(paths: list, processing_manager: ImageProcessingManager, detail: str) -> None:
+    """
+    Prints the preprocessing cost and the payload/token savings for each local image.
+    """
+    print(f"{'file':<32}{'original':>22}{'derivative':>22}{'tokens':>14}{'prep ms':>10}")
+    for path in paths:
+        with open(path, "rb") as file:
+            original = file.read()
+
+        start = time.perf_counter()
+        derivative = processing_manager.preprocess_image(original)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        before, after = image_stats(original), image_stats(derivative)
+        tokens_before = estimate_vision_tokens(before["width"], before["height"], detail)
+        tokens_after = estimate_vision_tokens(after["width"], after["height"], detail)
+
+        print(
+            f"{path[-31:]:<32}"
+            + f"{before['width']}x{before['height']} {before['bytes'] // 1024}KB".rjust(22)
+            + f"{after['width']}x{after['height']} {after['bytes'] // 1024}KB".rjust(22)
+            + f"{tokens_before}->{tokens_after}".rjust(14)
+            + f"{elapsed_ms:10.1f}"
+        )
+
+
+def run_live(blob: str, container_name: str, runs: int, detail: str) -> None:
+    """
+    Calls GPT-4o with the original upload and with its derivative and prints the latencies.
+    """
+    # Imported here so the offline mode does not need Azure OpenAI credentials
+    from src.packages.managers.ai_managers.image_generation_manager import ImageGenerationManager
+
+    processing_manager = ImageProcessingManager()
+    storage_manager = processing_manager.storage_manager
+    image_generation_manager = ImageGenerationManager()
+
+    paths = {
+        "original": blob,
+        "derivative": processing_manager.get_vision_blob(container_name, blob),
+    }
+
+    for label, blob_name in paths.items():
+        url = storage_manager.get_blob_url_with_sas(container_name, blob_name)
+        latencies = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            description = image_generation_manager.generate_image_description(url, detail)
+            latencies.append(time.perf_counter() - start)
+
+        print(f"== {label} ({blob_name})")
+        print(f"   median {statistics.median(latencies):.2f}s  min {min(latencies):.2f}s  max {max(latencies):.2f}s")
+        print(f"   {description}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="*", help="Local images to preprocess.")
+    parser.add_argument("--blob", help="Upload in the input container to describe with GPT-4o.")
+    parser.add_argument("--container", default="poc-input-selfi")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--detail", default="auto", choices=["low", "high", "auto"])
+    args = parser.parse_args()
+
+    if args.paths:
+        run_offline(args.paths, ImageProcessingManager(), args.detail)
+    if args.blob:
+        run_live(args.blob, args.container, args.runs, args.detail)
+    if not args.paths and not args.blob:
+        parser.print_help()
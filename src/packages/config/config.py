@@ -26,9 +26,51 @@ class Config:
         self.config_openai_deployment_dalle = "dall-e-3"
         self.config_openai_deployment_gpt_4o  = "gpt-4o"
 
+        # Azure OpenAI endpoint pool. Each entry maps the logical models ('gpt', 'gpt_4o',
+        # 'dalle') to the deployment names of that resource; add entries for other regions.
+        self.config_openai_endpoints = [
+            {
+                "name": "primary",
+                "api_base": self.config_openai_api_base,
+                "api_key": self.config_openai_key,
+                "weight": 1.0,
+                "deployments": {
+                    "gpt": self.config_openai_deployment_gpt,
+                    "gpt_4o": self.config_openai_deployment_gpt_4o,
+                    "dalle": self.config_openai_deployment_dalle,
+                },
+            },
+        ]
+        self.config_openai_latency_alpha = 0.3
+        self.config_openai_quota_reserve = 5
+        self.config_openai_breaker_failures = 3
+        self.config_openai_breaker_cooldown = 30
+        self.config_openai_hedge_delay = 6.0
+        self.config_openai_max_retries = 2
+        self.config_openai_max_retry_delay = 60
+        self.config_openai_pool_workers = 8
+
+        # Vision input preprocessing
+        self.config_vision_detail = "auto"
+        self.config_vision_max_side = 1024
+        self.config_vision_jpeg_quality = 85
+        self.config_vision_max_bytes = 500 * 1024
+        self.config_vision_prefix = "vision"
+
 
         # Storage Account
         self.config_storage_account_name = "storagepocselfi"
         self.config_storage_account_key = "yourkey"
         self.config_storage_account_ip_container = "poc-input-selfi"
-        self.config_storage_account_op_container = "poc-generated-selfi"
\ No newline at end of file
+        self.config_storage_account_op_container = "poc-generated-selfi"
+        self.config_storage_max_concurrency = 8
+        self.config_storage_max_batch_size = 100
+        self.config_storage_export_prefix = "exports"
+        self.config_storage_delete_batch_size = 256
+
+        # Retention
+        self.config_retention_days = 30
+
+        # Filter catalog
+        self.config_filters_path = os.path.join(os.path.dirname(__file__), "filters.json")
+        self.config_filters_max_age = 300
\ No newline at end of file
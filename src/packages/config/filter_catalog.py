@@ -0,0 +1,132 @@
+"""
+Provides FilterCatalog class with the image filters available in the application
+"""
+import hashlib
+import json
+import threading
+from string import Template
+from typing import Any, Dict, List
+
+from src.packages.config.config import Config
+
+
+class ImageFilter:
+    """
+    Filter of the catalog with its precompiled prompt template and generation parameters.
+
+    Attributes
+    ----------
+    name : str
+        Name of the filter, e.g. 'FunkoMe'.
+    description : str
+        Description shown in the frontend.
+    status : bool
+        Whether the filter is enabled in the frontend.
+    model : str
+        Logical model of the endpoint pool used to generate the image.
+    size : str
+        Size of the generated image, e.g. '1024x1024'.
+    quality : str
+        Quality of the generated image: 'standard' or 'hd'.
+    style : str
+        Style of the generated image: 'vivid' or 'natural'.
+    """
+
+    def __init__(self, name: str, base_prompt: str, settings: Dict[str, Any]) -> None:
+        """
+        Initializes the filter, resolving everything in its prompt but the image description.
+        """
+        self.name = name
+        self.description = settings.get("description", "")
+        self.status = settings.get("status", True)
+        self.model = settings["model"]
+        self.size = settings["size"]
+        self.quality = settings["quality"]
+        self.style = settings["style"]
+
+        # The name comes from the client, escape it so it is not parsed as a placeholder
+        self.template = Template(Template(base_prompt).safe_substitute(name=name.replace("$", "$$")) + settings["prompt"])
+
+    def render_prompt(self, image_description: str) -> str:
+        """
+        Returns the DALL-E prompt for the given image description.
+        """
+        return self.template.safe_substitute(description=image_description)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Returns the public fields of the filter served by af_list_filters.
+        """
+        return {"name": self.name, "description": self.description, "status": self.status}
+
+
+class FilterCatalog:
+    """
+    Registry of the image filters, loaded from `config_filters_path`.
+
+    Attributes
+    ----------
+    filters : Dict[str, ImageFilter]
+        Filters of the catalog by name, in the order of the file.
+    response_body : str
+        JSON body served by af_list_filters, built once.
+    etag : str
+        Strong ETag of `response_body`.
+    max_age : int
+        Seconds clients may cache `response_body`.
+
+    Methods
+    -------
+    get(filter_name: str) -> ImageFilter
+        Returns a filter, or a generic one for names not in the catalog.
+    list_filters() -> List[Dict[str, Any]]
+        Returns the public fields of every filter.
+    """
+
+    def __init__(self, config: Config) -> None:
+        """
+        Initializes the catalog from the filters file.
+        """
+        with open(config.config_filters_path, encoding="utf-8") as file:
+            catalog = json.load(file)
+
+        self.base_prompt = catalog["base_prompt"]
+        self.defaults = catalog["defaults"]
+        self.filters = {
+            settings["name"]: ImageFilter(settings["name"], self.base_prompt, {**self.defaults, **settings})
+            for settings in catalog["filters"]
+        }
+
+        self.response_body = json.dumps({"filters": self.list_filters()})
+        self.etag = '"' + hashlib.sha256(self.response_body.encode("utf-8")).hexdigest()[:32] + '"'
+        self.max_age = config.config_filters_max_age
+
+    def get(self, filter_name: str) -> ImageFilter:
+        """
+        Returns the filter with the given name. Names not in the catalog get the default
+        prompt and parameters, as any filter name is accepted by af_process_files.
+        """
+        if filter_name in self.filters:
+            return self.filters[filter_name]
+        return ImageFilter(filter_name, self.base_prompt, self.defaults)
+
+    def list_filters(self) -> List[Dict[str, Any]]:
+        """
+        Returns the public fields of every filter of the catalog.
+        """
+        return [image_filter.to_dict() for image_filter in self.filters.values()]
+
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+
+def get_filter_catalog() -> FilterCatalog:
+    """
+    Returns the filter catalog of the worker, loading it on first use.
+    """
+    global _catalog
+    with _catalog_lock:
+        if _catalog is None:
+            _catalog = FilterCatalog(Config())
+        return _catalog
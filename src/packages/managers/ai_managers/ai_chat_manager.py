@@ -3,9 +3,9 @@ Provides AIChatManager class to interact with Azure OpenAI
 """
 from typing import List, Dict
 import copy
-from openai import AzureOpenAI
 
 from src.packages.config.config import Config
+from src.packages.managers.ai_managers.endpoint_pool import get_endpoint_pool
 
 
 class AIChatManager:
@@ -17,10 +17,10 @@ class AIChatManager:
     ----------
     config : Config
         Configuration settings for the AIChatManager.
-    openai_deployment_gpt : str
-        Deployment name of the OpenAI GPT model.
-    client : AzureOpenAI
-        Client for interacting with the Azure OpenAI API.
+    openai_model_gpt : str
+        Logical name of the GPT model in the endpoint pool.
+    endpoint_pool : OpenAIEndpointPool
+        Pool of Azure OpenAI endpoints the requests are routed to.
 
     Methods
     -------
@@ -37,14 +37,11 @@ class AIChatManager:
         self.config = Config()
 
         # Initialize OpenAI
-        self.openai_deployment_gpt = self.config.config_openai_deployment_gpt
+        self.openai_model_gpt = "gpt"
+        self.openai_api_version = self.config.config_openai_api_version
 
-        # Create AzureOpenAI client
-        self.client = AzureOpenAI(
-            azure_endpoint=self.config.config_openai_api_base,
-            api_key=self.config.config_openai_key,
-            api_version=self.config.config_openai_api_version
-        )
+        # Shared pool of AzureOpenAI endpoints
+        self.endpoint_pool = get_endpoint_pool()
 
     def get_response_openai(
         self,
@@ -65,10 +62,14 @@ class AIChatManager:
         -------
         str: The response content from the OpenAI API.
         """
-        response = self.client.chat.completions.create(
-            model=self.openai_deployment_gpt,
-            messages=complete_chat,
-            temperature=temperature
+        response = self.endpoint_pool.request(
+            self.openai_model_gpt,
+            self.openai_api_version,
+            lambda client, deployment: client.chat.completions.with_raw_response.create(
+                model=deployment,
+                messages=complete_chat,
+                temperature=temperature
+            )
         )
 
         response_content = response.choices[0].message.content.strip()
@@ -0,0 +1,442 @@
+"""
+Provides OpenAIEndpointPool class to route Azure OpenAI requests across several endpoints
+"""
+import logging
+import random
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Dict, List, Optional
+from openai import AzureOpenAI, APIConnectionError, APIStatusError
+
+from src.packages.config.config import Config
+
+
+def _is_endpoint_failure(error: Exception) -> bool:
+    """
+    Returns True if the error is caused by the endpoint (throttling, outage, network)
+    rather than by the request itself, so it is worth retrying somewhere else.
+    """
+    if isinstance(error, APIConnectionError):
+        return True
+    if isinstance(error, APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    return False
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """
+    Returns the delay in seconds requested by a throttled or unavailable endpoint, if any.
+    """
+    if not isinstance(error, APIStatusError):
+        return None
+    retry_after_ms = _header_float(error.response.headers, "retry-after-ms")
+    if retry_after_ms is not None:
+        return retry_after_ms / 1000
+    return _header_float(error.response.headers, "retry-after")
+
+
+def _header_float(headers, name: str) -> Optional[float]:
+    """
+    Reads a numeric response header, returning None if it is missing or malformed.
+    """
+    value = headers.get(name) if headers is not None else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class OpenAIEndpoint:
+    """
+    Single Azure OpenAI resource of the pool, holding the clients shared by its deployments.
+
+    Attributes
+    ----------
+    name : str
+        Identifier of the endpoint used in logs.
+    api_base : str
+        URL of the Azure OpenAI resource.
+    deployments : Dict[str, str]
+        Deployment name of each model served by the endpoint, e.g. {'gpt_4o': 'gpt-4o'}.
+    weight : float
+        Static weight of the endpoint, e.g. to favour the closest region.
+    """
+
+    def __init__(self, settings: Dict[str, Any]) -> None:
+        """
+        Initializes the endpoint from one entry of `config_openai_endpoints`.
+        """
+        self.name = settings["name"]
+        self.api_base = settings["api_base"]
+        self.api_key = settings["api_key"]
+        self.deployments = settings["deployments"]
+        self.weight = settings.get("weight", 1.0)
+
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    def get_client(self, api_version: str) -> AzureOpenAI:
+        """
+        Returns the AzureOpenAI client of the endpoint for an API version, creating it once.
+        """
+        with self._lock:
+            if api_version not in self._clients:
+                self._clients[api_version] = AzureOpenAI(
+                    api_version=api_version,
+                    azure_endpoint=self.api_base,
+                    api_key=self.api_key,
+                    max_retries=0
+                )
+            return self._clients[api_version]
+
+
+class OpenAIDeployment:
+    """
+    Deployment of a model on one endpoint, with its observed latency, remaining quota
+    and circuit breaker state. Azure OpenAI applies rate limits per deployment, so a
+    throttled DALL-E deployment does not affect the GPT deployments of the same endpoint.
+
+    Attributes
+    ----------
+    endpoint : OpenAIEndpoint
+        Endpoint hosting the deployment.
+    model : str
+        Logical model name, e.g. 'gpt_4o'.
+    deployment_name : str
+        Name of the deployment in the Azure OpenAI resource.
+    name : str
+        Identifier of the deployment used in logs, '{endpoint}/{model}'.
+    weight : float
+        Static weight inherited from the endpoint.
+    latency : Optional[float]
+        Exponentially weighted moving average of the request latency in seconds.
+    remaining_requests : Optional[float]
+        Remaining requests in the current quota window, as reported by the deployment.
+    remaining_tokens : Optional[float]
+        Remaining tokens in the current quota window, as reported by the deployment.
+    """
+
+    def __init__(self, endpoint: OpenAIEndpoint, model: str, config: Config) -> None:
+        """
+        Initializes the deployment of `model` on `endpoint`.
+        """
+        self.endpoint = endpoint
+        self.model = model
+        self.deployment_name = endpoint.deployments[model]
+        self.name = f"{endpoint.name}/{model}"
+        self.weight = endpoint.weight
+
+        self.latency_alpha = config.config_openai_latency_alpha
+        self.failure_threshold = config.config_openai_breaker_failures
+        self.cooldown = config.config_openai_breaker_cooldown
+        self.quota_reserve = config.config_openai_quota_reserve
+
+        self.latency = None
+        self.remaining_requests = None
+        self.remaining_tokens = None
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+        self.probing = False
+
+        self._lock = threading.Lock()
+
+    def is_available(self, now: float) -> bool:
+        """
+        Returns True if the circuit breaker lets a request through. Once the cooldown
+        is over a single probe request is allowed (half-open) until it succeeds or fails.
+        """
+        with self._lock:
+            if self.consecutive_failures < self.failure_threshold:
+                return True
+            return now >= self.open_until and not self.probing
+
+    def acquire(self, now: float) -> None:
+        """
+        Marks the start of a request, flagging it as the probe if the breaker is half-open.
+        """
+        with self._lock:
+            if self.consecutive_failures >= self.failure_threshold and now >= self.open_until:
+                self.probing = True
+
+    def score(self, default_latency: float) -> float:
+        """
+        Returns the routing weight of the deployment: faster deployments with more remaining
+        quota receive proportionally more traffic.
+        """
+        latency = self.latency if self.latency is not None else default_latency
+        quota_factor = 1.0
+        for remaining in (self.remaining_requests, self.remaining_tokens):
+            if remaining is not None:
+                quota_factor = min(quota_factor, remaining / (remaining + self.quota_reserve))
+        return self.weight * max(quota_factor, 0.01) / max(latency, 0.05)
+
+    def record_success(self, latency: float, headers) -> None:
+        """
+        Updates latency and quota from a successful response and closes the breaker.
+        """
+        with self._lock:
+            if self.latency is None:
+                self.latency = latency
+            else:
+                self.latency = self.latency_alpha * latency + (1 - self.latency_alpha) * self.latency
+            self.remaining_requests = _header_float(headers, "x-ratelimit-remaining-requests")
+            self.remaining_tokens = _header_float(headers, "x-ratelimit-remaining-tokens")
+            self.consecutive_failures = 0
+            self.probing = False
+
+    def record_reachable(self) -> None:
+        """
+        Closes the breaker after the deployment answered a request it rejected, e.g. a
+        content filter error, without using that response to update latency or quota.
+        """
+        with self._lock:
+            self.consecutive_failures = 0
+            self.probing = False
+
+    def record_failure(self, error: Exception) -> None:
+        """
+        Counts a failure of the deployment and opens the breaker once the threshold is reached.
+        A throttled response opens it at least for the time given in `retry-after`.
+        """
+        now = time.monotonic()
+        with self._lock:
+            self.consecutive_failures += 1
+            self.probing = False
+            cooldown = self.cooldown
+            if isinstance(error, APIStatusError) and error.status_code == 429:
+                retry_after = _retry_after(error)
+                cooldown = max(cooldown, retry_after or 0)
+                self.consecutive_failures = max(self.consecutive_failures, self.failure_threshold)
+            if self.consecutive_failures >= self.failure_threshold:
+                self.open_until = now + cooldown
+                logging.warning(f"Azure OpenAI deployment '{self.name}' ejected for {cooldown}s: {error}")
+
+
+class OpenAIEndpointPool:
+    """
+    Routes Azure OpenAI requests across the deployments of a model on the configured
+    endpoints, weighting each one by its observed latency and remaining quota, ejecting
+    failing deployments with a circuit breaker and optionally hedging slow requests on a
+    second endpoint.
+
+    Attributes
+    ----------
+    endpoints : List[OpenAIEndpoint]
+        Endpoints of the pool.
+    deployments : Dict[str, List[OpenAIDeployment]]
+        Deployments of each logical model across the endpoints.
+    hedge_delay : float
+        Seconds to wait before sending a hedged request when hedging is requested.
+    max_retries : int
+        Rounds of retries with backoff once every deployment of the model has failed.
+
+    Methods
+    -------
+    request(model: str, api_version: str, operation: Callable, hedge: bool = False) -> Any
+        Sends a request to the best available deployment of the model.
+    """
+
+    def __init__(self, config: Config) -> None:
+        """
+        Initializes the pool from `config_openai_endpoints`.
+        """
+        self.endpoints = [OpenAIEndpoint(settings) for settings in config.config_openai_endpoints]
+        self.deployments = {}
+        for endpoint in self.endpoints:
+            for model in endpoint.deployments:
+                self.deployments.setdefault(model, []).append(OpenAIDeployment(endpoint, model, config))
+        self.hedge_delay = config.config_openai_hedge_delay
+        self.max_retries = config.config_openai_max_retries
+        self.max_retry_delay = config.config_openai_max_retry_delay
+
+        # Hedges only run on a free worker, so they never wait in the executor queue
+        self._executor = ThreadPoolExecutor(max_workers=config.config_openai_pool_workers)
+        self._hedge_slots = threading.BoundedSemaphore(config.config_openai_pool_workers)
+
+    def _candidates(self, model: str, exclude: List[OpenAIDeployment]) -> List[OpenAIDeployment]:
+        """
+        Returns the deployments of the model that have not been tried yet.
+        """
+        return [deployment for deployment in self.deployments.get(model, []) if deployment not in exclude]
+
+    def _choose(self, model: str, exclude: List[OpenAIDeployment]) -> Optional[OpenAIDeployment]:
+        """
+        Picks a deployment with a probability proportional to its score. If every breaker
+        is open, the deployment that will recover first is returned instead of failing.
+        """
+        candidates = self._candidates(model, exclude)
+        if not candidates:
+            return None
+
+        now = time.monotonic()
+        available = [deployment for deployment in candidates if deployment.is_available(now)]
+        if not available:
+            return min(candidates, key=lambda deployment: deployment.open_until)
+
+        # Deployments without measurements are scored with the average so they get traffic
+        known = [deployment.latency for deployment in available if deployment.latency is not None]
+        default_latency = sum(known) / len(known) if known else 1.0
+        scores = [deployment.score(default_latency) for deployment in available]
+        return random.choices(available, weights=scores, k=1)[0]
+
+    def _call(self, deployment: OpenAIDeployment, api_version: str, operation: Callable) -> Any:
+        """
+        Sends the request to one deployment, updating its statistics with the outcome.
+        """
+        deployment.acquire(time.monotonic())
+        start = time.monotonic()
+        try:
+            raw_response = operation(deployment.endpoint.get_client(api_version), deployment.deployment_name)
+        except Exception as e:
+            if _is_endpoint_failure(e):
+                deployment.record_failure(e)
+            else:
+                # The deployment answered, the request itself was rejected
+                deployment.record_reachable()
+            raise
+        deployment.record_success(time.monotonic() - start, raw_response.headers)
+        return raw_response.parse()
+
+    def _backoff(self, error: Exception, retry: int) -> float:
+        """
+        Returns the seconds to wait before a retry round: the `retry-after` requested by the
+        endpoint if any, otherwise an exponential backoff with jitter as in the OpenAI SDK.
+        """
+        retry_after = _retry_after(error)
+        if retry_after is not None and 0 <= retry_after <= self.max_retry_delay:
+            return retry_after
+        delay = min(0.5 * 2 ** (retry - 1), 8.0)
+        return delay * (1 - 0.25 * random.random())
+
+    def request(self, model: str, api_version: str, operation: Callable, hedge: bool = False) -> Any:
+        """
+        Sends a request to the best available deployment of the model, retrying on the
+        next best deployment when the failure is caused by the endpoint. Once every
+        deployment has failed, up to `max_retries` more rounds are made after a backoff.
+
+        Parameters
+        ----------
+        model : str
+            Logical model name, a key of each endpoint's `deployments`.
+        api_version : str
+            Azure OpenAI API version of the client.
+        operation : Callable[[AzureOpenAI, str], LegacyAPIResponse]
+            Function that sends the request with the given client and deployment name
+            using the `with_raw_response` interface, so quota headers can be read.
+        hedge : bool
+            If True and the first request has not answered after `hedge_delay` seconds,
+            the same request is also sent to a second endpoint and the first answer wins.
+
+        Returns
+        -------
+        Any
+            The parsed response of the first successful request.
+
+        Raises
+        ------
+        ValueError
+            If no endpoint serves the model.
+        Exception
+            The last error if every attempt failed.
+        """
+        tried = []
+        last_error = None
+        retry = 0
+
+        while True:
+            deployment = self._choose(model, tried)
+            if deployment is None:
+                if last_error is None or retry >= self.max_retries:
+                    break
+                retry += 1
+                delay = self._backoff(last_error, retry)
+                logging.info(f"Retrying request to model '{model}' in {delay:.2f}s (retry {retry})")
+                time.sleep(delay)
+                tried = []
+                continue
+            tried.append(deployment)
+
+            try:
+                if hedge and self.hedge_delay is not None:
+                    return self._hedged_call(deployment, api_version, operation, tried)
+                return self._call(deployment, api_version, operation)
+            except Exception as e:
+                if not _is_endpoint_failure(e):
+                    raise
+                logging.warning(f"Request to Azure OpenAI deployment '{deployment.name}' failed: {e}")
+                last_error = e
+
+        if last_error is None:
+            raise ValueError(f"No Azure OpenAI endpoint serves the model '{model}'.")
+        raise last_error
+
+    def _hedged_call(
+        self,
+        deployment: OpenAIDeployment,
+        api_version: str,
+        operation: Callable,
+        tried: List[OpenAIDeployment]
+    ) -> Any:
+        """
+        Sends the request to `deployment` and, if it is still pending after `hedge_delay`,
+        to a deployment on a second endpoint as well. Returns the first successful response.
+
+        The first request runs on its own thread so it starts at once and `hedge_delay`
+        only counts time spent on the endpoint. The hedge runs on the executor and is
+        skipped when no worker is free, so hedging never queues behind other requests.
+        """
+        first = Future()
+
+        def run_first():
+            try:
+                first.set_result(self._call(deployment, api_version, operation))
+            except Exception as e:
+                first.set_exception(e)
+
+        threading.Thread(target=run_first, daemon=True).start()
+        futures = [first]
+        done, _ = wait(futures, timeout=self.hedge_delay)
+
+        if not done:
+            second = self._choose(deployment.model, tried)
+            if second is not None and second.is_available(time.monotonic()) and self._hedge_slots.acquire(blocking=False):
+                tried.append(second)
+                logging.info(f"Hedging request to '{deployment.name}' on '{second.name}'")
+                futures.append(self._executor.submit(self._hedge, second, api_version, operation))
+
+        # The losing request keeps running in the background and still updates its stats
+        pending = set(futures)
+        last_error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+                last_error = future.exception()
+        raise last_error
+
+    def _hedge(self, deployment: OpenAIDeployment, api_version: str, operation: Callable) -> Any:
+        """
+        Sends a hedged request, releasing its executor slot once it finishes.
+        """
+        try:
+            return self._call(deployment, api_version, operation)
+        finally:
+            self._hedge_slots.release()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_endpoint_pool() -> OpenAIEndpointPool:
+    """
+    Returns the endpoint pool of the worker, creating it on first use so latency,
+    quota and breaker state are shared across invocations.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = OpenAIEndpointPool(Config())
+        return _pool
@@ -3,9 +3,10 @@ Provides ImageGenerationManager class to interact with Azure OpenAI and generate
 """
 import logging
 import json
-from openai import AzureOpenAI
 
 from src.packages.config.config import Config
+from src.packages.config.filter_catalog import get_filter_catalog
+from src.packages.managers.ai_managers.endpoint_pool import get_endpoint_pool
 
 class ImageGenerationManager:
     """
@@ -14,34 +15,37 @@ class ImageGenerationManager:
     
     Attributes
     ----------
-    client : AzureOpenAI
-        Azure OpenAI client configured with the API key and endpoint.
+    endpoint_pool : OpenAIEndpointPool
+        Pool of Azure OpenAI endpoints the requests are routed to.
+    filter_catalog : FilterCatalog
+        Filters with their prompt templates and generation parameters.
         
     Methods
     -------
     generate_image_with_dalle3(image_description: str, filter_name: str) -> str
         Generates a stylized image based on a description and filter.
-    generate_image_description(blob_image_url: str) -> str
+    generate_image_description(blob_image_url: str, detail: str = None) -> str
         Creates a description of an image using Azure OpenAI's GPT model.
     """
 
     def __init__(self):
         """
         Initializes the ImageGenerationManager instance with configuration settings
-        and the Azure OpenAI client.
+        and the Azure OpenAI endpoint pool.
         """
         # Load configuration
         self.config = Config()
         
         # Initialize OpenAI
-        self.openai_deployment_gpt_4o = self.config.config_openai_deployment_gpt_4o
-        self.openai_deployment_dalle = self.config.config_openai_deployment_dalle
+        self.openai_model_gpt_4o = "gpt_4o"
+        self.openai_api_version = "2024-05-01-preview"
+        self.vision_detail = self.config.config_vision_detail
 
-        self.client = AzureOpenAI(
-            api_version="2024-05-01-preview",
-            azure_endpoint=self.config.config_openai_api_base,  
-            api_key=self.config.config_openai_key
-        )
+        # Shared pool of AzureOpenAI endpoints
+        self.endpoint_pool = get_endpoint_pool()
+
+        # Filters with their prompts and generation parameters
+        self.filter_catalog = get_filter_catalog()
 
     def generate_image_with_dalle3(self, image_description: str, filter_name: str) -> str:
         """
@@ -64,47 +68,30 @@ class ImageGenerationManager:
         Exception
             If an error occurs during image generation.
         """
-        # Define prompt based on selected filter
-        base_prompt = image_description + f" transform it into a {filter_name}-style image. Ensure that the transformed character retains their gender, hairstyle, clothing, and overall likeness, including facial features and expression."
-        
-        # Customize prompt for specific filters
-        if filter_name == "FunkoMe":
-            prompt = base_prompt + (
-            "Transform the person in this image into a FunkoMe figure. "
-            "The character should maintain the features and expression from the original photo, "
-            "with bright colors and a playful vibe, resembling the distinctive FunkoPop style."
-        )
-        elif filter_name == "SnapHero":
-             prompt = base_prompt + (
-            "Transform the person in this image into a vibrant superhero character. "
-            "Create a cartoon-style portrait featuring bold outlines and exaggerated features. "
-            "The superhero should have a dynamic pose, showcasing strength and confidence. "
-            "Incorporate bright, vibrant colors in their costume and background to enhance the heroic theme. "
-            "Ensure the character retains the original person's gender, hairstyle, and key facial features while embodying the essence of a superhero."
-        )
-        elif filter_name == "MyPixar":
-            prompt = base_prompt + (
-            "Create a Pixar-style character portrait of the person in this image. "
-            "The character should have large, expressive eyes that convey emotion, and the lighting should be soft and warm, enhancing the friendly atmosphere. "
-            "Use smooth textures for the skin and clothing to mimic the polished look of Pixar animation. "
-            "Ensure the character retains the original person's hairstyle, gender, and distinct facial features, capturing their essence in a whimsical, cinematic style."
-        )
-        else:
-            prompt = base_prompt + "Create a stylized portrait of the person in this image, with a unique artistic filter applied."
+        # Build prompt and parameters from the filter catalog
+        image_filter = self.filter_catalog.get(filter_name)
+        prompt = image_filter.render_prompt(image_description)
 
         # Generate image with DALL-E 3
         try:
-            result = self.client.images.generate(
-                model= self.openai_deployment_dalle,
-                prompt=prompt,
-                n=1
+            result = self.endpoint_pool.request(
+                image_filter.model,
+                self.openai_api_version,
+                lambda client, deployment: client.images.with_raw_response.generate(
+                    model=deployment,
+                    prompt=prompt,
+                    size=image_filter.size,
+                    quality=image_filter.quality,
+                    style=image_filter.style,
+                    n=1
+                )
             )
             generated_image_url = json.loads(result.model_dump_json())['data'][0]['url']
             return generated_image_url
         except Exception as e:
             raise Exception(f"Error generating image with DALL-E 3: {e}")
 
-    def generate_image_description(self, blob_image_url: str) -> str:
+    def generate_image_description(self, blob_image_url: str, detail: str = None) -> str:
         """
         Generates a detailed description of an image from the provided Blob URL.
 
@@ -112,6 +99,9 @@ class ImageGenerationManager:
         ----------
         blob_image_url : str
             URL of the image stored in Azure Blob Storage.
+        detail : str, optional
+            Vision detail level sent to GPT-4o: 'low', 'high' or 'auto'.
+            Defaults to the configured `config_vision_detail`.
 
         Returns
         -------
@@ -124,18 +114,24 @@ class ImageGenerationManager:
             If an error occurs during description generation.
         """
         try:
-            response = self.client.chat.completions.create(
-                model= self.openai_deployment_gpt_4o,
-                messages=[
-                    {
-                        "role": "user",
-                        "content": [
-                            {"type": "text", "text": "Analyze this image and provide a detailed description about the gender, hairstyle, clothing, and overall likeness, including facial features and expression."},
-                            {"type": "image_url", "image_url": {"url": blob_image_url}},
-                        ],
-                    }
-                ],
-                max_tokens=300,
+            # Hedged: a slow endpoint is raced against a second one
+            response = self.endpoint_pool.request(
+                self.openai_model_gpt_4o,
+                self.openai_api_version,
+                lambda client, deployment: client.chat.completions.with_raw_response.create(
+                    model=deployment,
+                    messages=[
+                        {
+                            "role": "user",
+                            "content": [
+                                {"type": "text", "text": "Analyze this image and provide a detailed description about the gender, hairstyle, clothing, and overall likeness, including facial features and expression."},
+                                {"type": "image_url", "image_url": {"url": blob_image_url, "detail": detail or self.vision_detail}},
+                            ],
+                        }
+                    ],
+                    max_tokens=300,
+                ),
+                hedge=True
             )
             
             return response.choices[0].message.content
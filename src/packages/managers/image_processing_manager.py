@@ -0,0 +1,132 @@
+"""
+Provides ImageProcessingManager class to prepare input selfies before sending them to the AI services
+"""
+
+from io import BytesIO
+import logging
+from PIL import Image, ImageOps
+from src.packages.config.config import Config
+from src.packages.managers.storage_manager import AzureStorageManager
+
+
+class ImageProcessingManager():
+    """
+    Builds normalized, downscaled derivatives of the uploaded selfies so the vision model
+    receives a small, upright image instead of the full-resolution upload.
+
+    Attributes
+    ----------
+    config : Config
+        Configuration object containing the preprocessing settings.
+    storage_manager : AzureStorageManager
+        Storage manager used to read the original upload and store the derivative.
+    vision_max_side : int
+        Maximum length in pixels of the longest side of the derivative.
+    vision_jpeg_quality : int
+        JPEG quality used to encode the derivative.
+    vision_max_bytes : int
+        Maximum size in bytes of the encoded derivative.
+    vision_prefix : str
+        Virtual folder inside the input container where derivatives are stored.
+
+    Methods
+    -------
+    preprocess_image(data: bytes) -> bytes
+        Rotates, converts and downscales an image and returns it encoded as JPEG.
+    get_vision_blob(container_name: str, blob_filename: str) -> str
+        Returns the name of the derivative of an input blob, creating it if needed.
+    """
+
+    def __init__(self, storage_manager: AzureStorageManager = None) -> None:
+        """
+        Initializes the ImageProcessingManager instance by loading configuration settings.
+        """
+        # Load configuration
+        self.config = Config()
+        self.storage_manager = storage_manager or AzureStorageManager()
+
+        # Preprocessing settings
+        self.vision_max_side = self.config.config_vision_max_side
+        self.vision_jpeg_quality = self.config.config_vision_jpeg_quality
+        self.vision_max_bytes = self.config.config_vision_max_bytes
+        self.vision_prefix = self.config.config_vision_prefix
+
+    def preprocess_image(self, data: bytes) -> bytes:
+        """
+        Applies the EXIF orientation, converts to RGB, downscales and encodes an image as JPEG.
+
+        Parameters
+        ----------
+        data : bytes
+            The raw content of the original image.
+
+        Returns
+        -------
+        bytes
+            The JPEG-encoded derivative. Its longest side is at most `vision_max_side`
+            pixels and, whenever possible, its size is at most `vision_max_bytes`.
+
+        Raises
+        ------
+        ValueError
+            If the content cannot be decoded as an image.
+        """
+        try:
+            image = Image.open(BytesIO(data))
+            image.load()
+        except Exception as e:
+            raise ValueError(f"Input file is not a valid image: {e}")
+
+        # Phones store the rotation as an EXIF tag instead of rotating the pixels
+        image = ImageOps.exif_transpose(image)
+
+        # Flatten transparency over white, JPEG has no alpha channel
+        if image.mode in ("RGBA", "LA", "P"):
+            image = image.convert("RGBA")
+            background = Image.new("RGB", image.size, (255, 255, 255))
+            background.paste(image, mask=image.getchannel("A"))
+            image = background
+        elif image.mode != "RGB":
+            image = image.convert("RGB")
+
+        image.thumbnail((self.vision_max_side, self.vision_max_side), Image.LANCZOS)
+
+        # Lower the quality until the derivative fits the size cap
+        quality = self.vision_jpeg_quality
+        while True:
+            buffer = BytesIO()
+            image.save(buffer, format="JPEG", quality=quality, optimize=True)
+            if buffer.tell() <= self.vision_max_bytes or quality <= 40:
+                break
+            quality -= 10
+
+        return buffer.getvalue()
+
+    def get_vision_blob(self, container_name: str, blob_filename: str) -> str:
+        """
+        Returns the name of the vision derivative of an input blob. The derivative is stored
+        in the same container under `vision_prefix` and is only generated once per upload.
+
+        Parameters
+        ----------
+        container_name : str
+            The name of the Azure storage container holding the original upload.
+        blob_filename : str
+            The name of the original blob.
+
+        Returns
+        -------
+        str
+            The name of the derivative blob within the same container.
+        """
+        vision_blob = f"{self.vision_prefix}/{blob_filename.rsplit('.', 1)[0]}.jpg"
+
+        if self.storage_manager.check_blob(container_name, vision_blob):
+            return vision_blob
+
+        original = self.storage_manager.get_blob(container_name=container_name, blob=blob_filename, fmt="img").read()
+        derivative = self.preprocess_image(original)
+        self.storage_manager.upload_blob(container_name, vision_blob, derivative)
+        logging.info(f"Stored vision derivative {vision_blob}: {len(original)} -> {len(derivative)} bytes")
+
+        return vision_blob
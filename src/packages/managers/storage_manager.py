@@ -3,15 +3,39 @@ Provides AzureStorageManager class to manage the storage
 """
 
 import json
-from typing import Union, IO
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Union, IO
 from io import BytesIO
 import logging
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 import pandas as pd
-from azure.storage.blob import BlobServiceClient, BlobClient, generate_blob_sas, BlobSasPermissions
+from azure.storage.blob import BlobServiceClient, BlobClient, ContentSettings, generate_blob_sas, BlobSasPermissions
 from src.packages.config.config import Config
 
 
+class _ChunkBuffer():
+    """
+    Write-only, non-seekable file object collecting what zipfile writes so it can be
+    handed out chunk by chunk. zipfile falls back to data descriptors when it cannot seek.
+    """
+
+    def __init__(self) -> None:
+        self._chunks = []
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
 class AzureStorageManager():
     """
     Manages Azure Blob Storage operations including uploading and checking blobs.
@@ -35,10 +59,22 @@ class AzureStorageManager():
 
     Methods
     -------
-    upload_blob(container_name: str, blob: str, data: Union[bytes, IO[bytes]]) -> None
+    upload_blob(container_name: str, blob: str, data: Union[bytes, IO[bytes], Iterable[bytes]]) -> None
         Uploads a blob to Azure Blob Storage.
     check_blob(container_name: str, blob: str) -> bool
         Checks if a blob exists in Azure Blob Storage.
+    check_blobs(container_name: str, blobs: List[str]) -> Dict[str, Union[bool, Exception]]
+        Checks concurrently if several blobs exist in Azure Blob Storage.
+    get_blob(container_name: str, blob: str, fmt: str) -> Any
+        Downloads a blob in the specified format.
+    get_blobs(container_name: str, blobs: List[str], fmt: str) -> Dict[str, Any]
+        Downloads several blobs concurrently in the specified format.
+    list_blob_properties(container_name: str, name_starts_with: str = None) -> List[Dict[str, Any]]
+        Lists the blobs of a container with their size and last modification date.
+    iter_zip(container_name: str, blobs: List[str]) -> Iterator[bytes]
+        Streams a ZIP archive of several blobs without holding them in memory.
+    delete_blobs(container_name: str, blobs: List[str]) -> List[str]
+        Deletes several blobs using batch requests.
     """
 
     def __init__(self) -> None:
@@ -54,6 +90,8 @@ class AzureStorageManager():
         self.storage_account_container = self.config.config_storage_account_ip_container
         self.storage_account_key = self.config.config_storage_account_key
         self.storage_account_cnn_str = f"DefaultEndpointsProtocol=https;AccountName={self.storage_account_name};AccountKey={self.storage_account_key}"
+        self.storage_max_concurrency = self.config.config_storage_max_concurrency
+        self.storage_delete_batch_size = self.config.config_storage_delete_batch_size
         
     def get_blob_url_with_sas(self, container_name: str, blob_filename: str) -> str:
         """
@@ -93,7 +131,14 @@ class AzureStorageManager():
         blob_url_with_sas = f"https://{self.storage_account_name}.blob.core.windows.net/{container_name}/{blob_filename}?{sas_token}"
         return blob_url_with_sas
     
-    def upload_blob(self, container_name: str, blob: str, data: Union[bytes, IO[bytes]], metadata=None) -> None:
+    def upload_blob(
+        self,
+        container_name: str,
+        blob: str,
+        data: Union[bytes, IO[bytes], Iterable[bytes]],
+        metadata=None,
+        content_type: str = None
+    ) -> None:
         """
         Uploads a blob to the specified container in Azure Blob Storage.
 
@@ -103,9 +148,13 @@ class AzureStorageManager():
             The name of the Azure storage container.
         blob : str
             The name of the blob within the container.
-        data : Union[bytes, IO[bytes]]
-            The data to upload, either as a bytes object or as a file-like object opened in
-            binary mode.
+        data : Union[bytes, IO[bytes], Iterable[bytes]]
+            The data to upload, either as a bytes object, as a file-like object opened in
+            binary mode or as an iterable of chunks, which is uploaded block by block.
+        metadata : Dict[str, str], optional
+            Metadata to set on the blob.
+        content_type : str, optional
+            Content type of the blob, e.g. 'application/zip'.
 
         Returns
         -------
@@ -124,7 +173,8 @@ class AzureStorageManager():
         # Upload blob
         blob.upload_blob(
             data=data,
-            overwrite=True
+            overwrite=True,
+            content_settings=ContentSettings(content_type=content_type) if content_type else None
         )
 
         # Set metadata if provided
@@ -196,6 +246,14 @@ class AzureStorageManager():
         blob_client = blob_service_client.get_blob_client(
             container=container_name, blob=blob
         )
+
+        return self._read_blob(blob_client, fmt)
+
+    def _read_blob(self, blob_client: BlobClient, fmt: str):
+        """
+        Downloads the content of a blob and converts it to the specified format.
+        See `get_blob` for the supported formats.
+        """
         stream = blob_client.download_blob()
         result = stream.readall()
 
@@ -221,7 +279,100 @@ class AzureStorageManager():
             raise ValueError("Specify a valid format to read data: [json, csv, txt, excel]")
         return data
     
-    def list_blobs(self, container_name: str):
+    def _run_concurrently(
+        self,
+        container_name: str,
+        blobs: List[str],
+        operation: Callable[[BlobClient], Any],
+        max_concurrency: int = None
+    ) -> Dict[str, Any]:
+        """
+        Runs an operation on several blobs of a container with a bounded number of threads.
+
+        Parameters
+        ----------
+        container_name : str
+            The name of the Azure storage container.
+        blobs : List[str]
+            The names of the blobs.
+        operation : Callable[[BlobClient], Any]
+            Function applied to the client of each blob.
+        max_concurrency : int, optional
+            Maximum number of concurrent requests, capped by `storage_max_concurrency`
+            which is also the default.
+
+        Returns
+        -------
+        Dict[str, Any]
+            The result of the operation for each blob, or the exception it raised, so a
+            failing blob does not affect the others.
+        """
+        blob_service_client = BlobServiceClient.from_connection_string(
+            conn_str=self.storage_account_cnn_str,
+        )
+        container_client = blob_service_client.get_container_client(container_name)
+
+        def run(blob: str):
+            try:
+                return operation(container_client.get_blob_client(blob))
+            except Exception as e:
+                logging.error(f"Error accessing blob '{blob}' in '{container_name}': {str(e)}")
+                return e
+
+        # A requested concurrency can lower the configured cap but never raise it
+        max_workers = self.storage_max_concurrency
+        if max_concurrency:
+            max_workers = min(int(max_concurrency), max_workers)
+        max_workers = max(1, min(max_workers, len(blobs)))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = executor.map(run, blobs)
+
+        return dict(zip(blobs, results))
+
+    def check_blobs(self, container_name: str, blobs: List[str], max_concurrency: int = None) -> Dict[str, Union[bool, Exception]]:
+        """
+        Checks concurrently if several blobs exist in the specified container.
+
+        Parameters
+        ----------
+        container_name : str
+            The name of the Azure storage container.
+        blobs : List[str]
+            The names of the blobs to check.
+        max_concurrency : int, optional
+            Maximum number of concurrent requests, capped by `storage_max_concurrency`.
+
+        Returns
+        -------
+        Dict[str, Union[bool, Exception]]
+            For each blob, True if it exists, False otherwise, or the error raised while checking it.
+        """
+        return self._run_concurrently(container_name, blobs, lambda blob_client: blob_client.exists(), max_concurrency)
+
+    def get_blobs(self, container_name: str, blobs: List[str], fmt: str, max_concurrency: int = None) -> Dict[str, Any]:
+        """
+        Downloads concurrently several blobs from the specified container.
+
+        Parameters
+        ----------
+        container_name : str
+            The name of the Azure storage container.
+        blobs : List[str]
+            The names of the blobs to be downloaded.
+        fmt : str
+            The desired format of the downloaded content, see `get_blob`.
+        max_concurrency : int, optional
+            Maximum number of concurrent downloads, capped by `storage_max_concurrency`.
+
+        Returns
+        -------
+        Dict[str, Any]
+            For each blob, its content in the specified format or the error raised while
+            downloading it (e.g. ResourceNotFoundError).
+        """
+        return self._run_concurrently(container_name, blobs, lambda blob_client: self._read_blob(blob_client, fmt), max_concurrency)
+
+    def list_blobs(self, container_name: str, name_starts_with: str = None):
         """
         Lists all blobs in the specified Azure Blob Storage container.
 
@@ -229,6 +380,8 @@ class AzureStorageManager():
         ----------
         container_name : str
             The name of the Azure storage container from which to list blobs.
+        name_starts_with : str, optional
+            Only blobs whose name starts with this prefix are listed, e.g. '{session_id}/'.
 
         Returns
         -------
@@ -247,13 +400,28 @@ class AzureStorageManager():
          
         container_client = blob_service_client.get_container_client(container_name)
 
-        blob_list = container_client.list_blobs()
+        blob_list = container_client.list_blobs(name_starts_with=name_starts_with)
 
         blobs = [blob.name for blob in blob_list]
 
         return blobs
     
-    def list_blobs_with_metadata(self, container_name: str):
+    def list_blobs_with_metadata(self, container_name: str, exclude_prefix: str = None):
+        """
+        Lists the blobs in the specified container together with their `file_name` metadata.
+
+        Parameters
+        ----------
+        container_name : str
+            The name of the Azure storage container from which to list blobs.
+        exclude_prefix : str, optional
+            Blobs whose name starts with this prefix are left out of the result.
+
+        Returns
+        -------
+        List[Dict[str, str]]
+            A list of dictionaries with the blob `id` and its `name` metadata.
+        """
         blob_service_client = BlobServiceClient.from_connection_string(
             conn_str=self.storage_account_cnn_str,
         )
@@ -265,6 +433,9 @@ class AzureStorageManager():
 
         for blob in blob_list:
 
+            if exclude_prefix and blob.name.startswith(exclude_prefix):
+                continue
+
             blob_client = container_client.get_blob_client(blob.name)
 
             properties = blob_client.get_blob_properties()
@@ -275,3 +446,109 @@ class AzureStorageManager():
             })
 
         return blobs_with_metadata
+
+    def list_blob_properties(self, container_name: str, name_starts_with: str = None) -> List[Dict[str, Any]]:
+        """
+        Lists the blobs of the specified container with their size and last modification date.
+
+        Parameters
+        ----------
+        container_name : str
+            The name of the Azure storage container from which to list blobs.
+        name_starts_with : str, optional
+            Only blobs whose name starts with this prefix are listed.
+
+        Returns
+        -------
+        List[Dict[str, Any]]
+            A list of dictionaries with the blob `name`, its `size` in bytes and its
+            `last_modified` datetime.
+        """
+        blob_service_client = BlobServiceClient.from_connection_string(
+            conn_str=self.storage_account_cnn_str,
+        )
+
+        container_client = blob_service_client.get_container_client(container_name)
+
+        return [
+            {"name": blob.name, "size": blob.size, "last_modified": blob.last_modified}
+            for blob in container_client.list_blobs(name_starts_with=name_starts_with)
+        ]
+
+    def iter_zip(self, container_name: str, blobs: List[str], strip_prefix: str = "") -> Iterator[bytes]:
+        """
+        Streams a ZIP archive of several blobs. Each blob is downloaded and written to the
+        archive chunk by chunk, so memory stays constant whatever the number and size of blobs.
+
+        Parameters
+        ----------
+        container_name : str
+            The name of the Azure storage container.
+        blobs : List[str]
+            The names of the blobs to archive.
+        strip_prefix : str, optional
+            Prefix removed from the blob names to build the paths inside the archive.
+
+        Yields
+        ------
+        bytes
+            Consecutive chunks of the archive.
+        """
+        blob_service_client = BlobServiceClient.from_connection_string(
+            conn_str=self.storage_account_cnn_str,
+        )
+        container_client = blob_service_client.get_container_client(container_name)
+
+        buffer = _ChunkBuffer()
+        # Images are already compressed, storing them avoids wasting CPU
+        with zipfile.ZipFile(buffer, mode="w", compression=zipfile.ZIP_STORED) as archive:
+            for blob in blobs:
+                arcname = blob[len(strip_prefix):] if blob.startswith(strip_prefix) else blob
+                downloader = container_client.get_blob_client(blob).download_blob()
+                with archive.open(arcname, mode="w", force_zip64=True) as entry:
+                    for chunk in downloader.chunks():
+                        entry.write(chunk)
+                        data = buffer.drain()
+                        if data:
+                            yield data
+
+        # Last data descriptor and central directory, written on close
+        yield buffer.drain()
+
+    def delete_blobs(self, container_name: str, blobs: List[str]) -> List[str]:
+        """
+        Deletes several blobs of the specified container, sending up to
+        `storage_delete_batch_size` deletions (256 at most) in each batch request.
+
+        Parameters
+        ----------
+        container_name : str
+            The name of the Azure storage container.
+        blobs : List[str]
+            The names of the blobs to delete.
+
+        Returns
+        -------
+        List[str]
+            The names of the blobs actually deleted. Blobs that could not be deleted are
+            logged and skipped so one failure does not abort the rest of the batch.
+        """
+        blob_service_client = BlobServiceClient.from_connection_string(
+            conn_str=self.storage_account_cnn_str,
+        )
+
+        container_client = blob_service_client.get_container_client(container_name)
+
+        batch_size = min(self.storage_delete_batch_size, 256)
+        deleted = []
+
+        for start in range(0, len(blobs), batch_size):
+            batch = blobs[start:start + batch_size]
+            responses = container_client.delete_blobs(*batch, delete_snapshots="include", raise_on_any_failure=False)
+            for blob, response in zip(batch, responses):
+                if response.status_code == 202:
+                    deleted.append(blob)
+                elif response.status_code != 404:
+                    logging.error(f"Error deleting blob '{blob}' in '{container_name}': status {response.status_code}")
+
+        return deleted
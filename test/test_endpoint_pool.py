@@ -0,0 +1,159 @@
+"""
+Tests of OpenAIEndpointPool routing, circuit breaking, retries and hedging with a fake operation
+"""
+import time
+import httpx
+import pytest
+from openai import BadRequestError, InternalServerError, RateLimitError
+
+from src.packages.config.config import Config
+from src.packages.managers.ai_managers.endpoint_pool import OpenAIEndpointPool
+
+
+class FakeResponse:
+    """Stands in for the LegacyAPIResponse returned by `with_raw_response`."""
+
+    def __init__(self, value):
+        self.value = value
+        self.headers = httpx.Headers({"x-ratelimit-remaining-requests": "100"})
+
+    def parse(self):
+        return self.value
+
+
+def status_error(error_class, status_code, headers=None):
+    request = httpx.Request("POST", "https://example.openai.azure.com/")
+    response = httpx.Response(status_code, headers=headers or {}, request=request)
+    return error_class(f"status {status_code}", response=response, body=None)
+
+
+def make_pool(*names, **settings):
+    config = Config()
+    config.config_openai_endpoints = [
+        {
+            "name": name,
+            "api_base": f"https://{name}.openai.azure.com/",
+            "api_key": "key",
+            "deployments": {"gpt_4o": name, "dalle": f"{name}-dalle"},
+        }
+        for name in names
+    ]
+    config.config_openai_breaker_failures = 2
+    config.config_openai_breaker_cooldown = 0.2
+    config.config_openai_hedge_delay = 0.05
+    for key, value in settings.items():
+        setattr(config, key, value)
+    return OpenAIEndpointPool(config)
+
+
+def scripted(behaviours):
+    """
+    Returns an operation that, for each deployment, pops the next behaviour: a value to
+    answer, an exception to raise or a (delay, value) tuple. Calls are recorded.
+    """
+    calls = []
+
+    def operation(client, deployment):
+        calls.append(deployment)
+        behaviour = behaviours[deployment].pop(0) if len(behaviours[deployment]) > 1 else behaviours[deployment][0]
+        if isinstance(behaviour, Exception):
+            raise behaviour
+        if isinstance(behaviour, tuple):
+            time.sleep(behaviour[0])
+            behaviour = behaviour[1]
+        return FakeResponse(behaviour)
+
+    return operation, calls
+
+
+def test_failover_to_next_endpoint():
+    pool = make_pool("east", "west", config_openai_max_retries=0)
+    # Whichever endpoint is picked first fails over to the other one
+    operation, calls = scripted({"east": [status_error(InternalServerError, 500)], "west": [status_error(InternalServerError, 500)]})
+    with pytest.raises(InternalServerError):
+        pool.request("gpt_4o", "2024-05-01-preview", operation)
+    assert sorted(calls) == ["east", "west"]
+
+    healthy, calls = scripted({"east": [status_error(InternalServerError, 500)], "west": ["west"]})
+    results = {pool.request("gpt_4o", "2024-05-01-preview", healthy) for _ in range(5)}
+    assert results == {"west"}
+
+
+def test_ejection_and_recovery():
+    pool = make_pool("east", "west", config_openai_max_retries=0)
+    east = pool.deployments["gpt_4o"][0]
+    for _ in range(2):
+        east.record_failure(status_error(InternalServerError, 500))
+    assert not east.is_available(time.monotonic())
+
+    operation, calls = scripted({"east": ["east"], "west": ["west"]})
+    assert {pool.request("gpt_4o", "2024-05-01-preview", operation) for _ in range(10)} == {"west"}
+
+    # After the cooldown a single probe goes through and closes the breaker
+    time.sleep(0.25)
+    assert east.is_available(time.monotonic())
+    east.acquire(time.monotonic())
+    assert not east.is_available(time.monotonic())
+    east.record_success(0.1, None)
+    assert east.is_available(time.monotonic())
+
+
+def test_throttled_deployment_does_not_eject_other_models():
+    pool = make_pool("east", "west", config_openai_max_retries=0)
+    east_gpt, east_dalle = pool.deployments["gpt_4o"][0], pool.deployments["dalle"][0]
+    east_gpt.record_success(3.0, httpx.Headers({"x-ratelimit-remaining-requests": "100"}))
+
+    throttled = status_error(RateLimitError, 429, {"retry-after": "60"})
+    operation, calls = scripted({"east-dalle": [throttled], "west-dalle": ["west-dalle"]})
+    pool.deployments["dalle"][1].weight = 1e-6
+    assert pool.request("dalle", "2024-05-01-preview", operation) == "west-dalle"
+
+    assert not east_dalle.is_available(time.monotonic())
+    assert east_gpt.is_available(time.monotonic())
+    assert east_gpt.remaining_requests == 100
+    assert east_gpt.latency == 3.0
+    assert east_gpt.endpoint is east_dalle.endpoint
+
+
+def test_request_error_is_raised_without_failover():
+    pool = make_pool("east", "west")
+    content_filter = status_error(BadRequestError, 400)
+    operation, calls = scripted({"east": [content_filter], "west": [content_filter]})
+    with pytest.raises(BadRequestError):
+        pool.request("gpt_4o", "2024-05-01-preview", operation)
+    assert len(calls) == 1
+    assert all(deployment.consecutive_failures == 0 for deployment in pool.deployments["gpt_4o"])
+
+
+def test_single_endpoint_retries_after_throttling():
+    pool = make_pool("primary")
+    throttled = status_error(RateLimitError, 429, {"retry-after-ms": "10"})
+    operation, calls = scripted({"primary": [throttled, "primary"]})
+    assert pool.request("gpt_4o", "2024-05-01-preview", operation) == "primary"
+    assert calls == ["primary", "primary"]
+
+    operation, calls = scripted({"primary": [throttled]})
+    with pytest.raises(RateLimitError):
+        pool.request("gpt_4o", "2024-05-01-preview", operation)
+    assert len(calls) == 1 + pool.max_retries
+
+
+def test_hedging_first_answer_wins():
+    pool = make_pool("east", "west")
+    # Make the slow endpoint the first choice, the hedge on the other one answers first
+    pool.deployments["gpt_4o"][1].weight = 1e-6
+    operation, calls = scripted({"east": [(0.5, "east")], "west": [(0.0, "west")]})
+    start = time.monotonic()
+    assert pool.request("gpt_4o", "2024-05-01-preview", operation, hedge=True) == "west"
+    assert time.monotonic() - start < 0.4
+    assert calls == ["east", "west"]
+
+
+def test_hedging_skipped_when_executor_is_busy():
+    pool = make_pool("east", "west", config_openai_pool_workers=1)
+    pool.deployments["gpt_4o"][1].weight = 1e-6
+    assert pool._hedge_slots.acquire(blocking=False)
+    operation, calls = scripted({"east": [(0.1, "east")], "west": [(0.0, "west")]})
+    assert pool.request("gpt_4o", "2024-05-01-preview", operation, hedge=True) == "east"
+    assert calls == ["east"]
+    pool._hedge_slots.release()
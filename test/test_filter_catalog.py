@@ -0,0 +1,18 @@
+"""
+Tests of FilterCatalog prompt rendering
+"""
+from src.packages.config.config import Config
+from src.packages.config.filter_catalog import FilterCatalog
+
+
+def test_known_filter_prompt():
+    prompt = FilterCatalog(Config()).get("FunkoMe").render_prompt("A woman with curly hair.")
+    assert prompt.startswith("A woman with curly hair. transform it into a FunkoMe-style image.")
+    assert prompt.endswith("resembling the distinctive FunkoPop style.")
+
+
+def test_filter_name_is_not_parsed_as_template():
+    catalog = FilterCatalog(Config())
+    for name in ["$description", "a$$b", "${name}", "$"]:
+        prompt = catalog.get(name).render_prompt("A $man.")
+        assert prompt.startswith(f"A $man. transform it into a {name}-style image.")
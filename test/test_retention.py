@@ -0,0 +1,85 @@
+"""
+Tests of the session grouping and expiry of af_retention with a fake storage manager
+"""
+from datetime import datetime, timedelta, timezone
+
+from af_retention import purge_expired_sessions, session_of
+from src.packages.config.config import Config
+
+NOW = datetime(2026, 10, 1, tzinfo=timezone.utc)
+OLD = NOW - timedelta(days=60)
+RECENT = NOW - timedelta(days=1)
+
+
+class FakeStorageManager:
+    """Keeps blobs in memory and records the deletions; `fail` blobs are never deleted."""
+
+    def __init__(self, blobs, fail=()):
+        self.config = Config()
+        self.blobs = blobs
+        self.fail = set(fail)
+        self.deleted = {}
+
+    def list_blob_properties(self, container_name, name_starts_with=None):
+        return [
+            {"name": name, "size": size, "last_modified": last_modified}
+            for name, (size, last_modified) in self.blobs.get(container_name, {}).items()
+        ]
+
+    def delete_blobs(self, container_name, blobs):
+        deleted = [blob for blob in blobs if blob not in self.fail]
+        self.deleted.setdefault(container_name, []).extend(deleted)
+        return deleted
+
+
+def session_blobs(session_id, last_modified, generated_modified=None):
+    generated_modified = generated_modified or last_modified
+    return (
+        {
+            f"{session_id}.png": (100, last_modified),
+            f"vision/{session_id}.jpg": (10, last_modified),
+        },
+        {
+            f"{session_id}/{session_id}_FunkoMe.png": (1000, generated_modified),
+            f"exports/{session_id}.zip": (2000, generated_modified),
+        },
+    )
+
+
+def build_storage(sessions, fail=()):
+    inputs, outputs = {}, {}
+    for session_input, session_output in sessions:
+        inputs.update(session_input)
+        outputs.update(session_output)
+    return FakeStorageManager({"poc-input-selfi": inputs, "poc-generated-selfi": outputs}, fail)
+
+
+def test_all_blob_names_map_to_the_session():
+    prefixes = ["vision", "exports"]
+    for name in ["abc.png", "vision/abc.jpg", "abc/abc_FunkoMe.png", "exports/abc.zip"]:
+        assert session_of(name, prefixes) == "abc"
+
+
+def test_expired_session_is_deleted_from_both_containers():
+    storage = build_storage([session_blobs("old", OLD)])
+    summary = purge_expired_sessions(storage, now=NOW)
+
+    assert sorted(storage.deleted["poc-input-selfi"]) == ["old.png", "vision/old.jpg"]
+    assert sorted(storage.deleted["poc-generated-selfi"]) == ["exports/old.zip", "old/old_FunkoMe.png"]
+    assert summary == {"sessions": 1, "blobs": 4, "bytes": 3110}
+
+
+def test_session_with_a_recent_blob_is_kept():
+    storage = build_storage([session_blobs("old", OLD), session_blobs("active", OLD, generated_modified=RECENT)])
+    purge_expired_sessions(storage, now=NOW)
+
+    deleted = storage.deleted["poc-input-selfi"] + storage.deleted["poc-generated-selfi"]
+    assert not [blob for blob in deleted if "active" in blob]
+    assert len(deleted) == 4
+
+
+def test_summary_counts_only_confirmed_deletions():
+    storage = build_storage([session_blobs("old", OLD)], fail=["old/old_FunkoMe.png"])
+    summary = purge_expired_sessions(storage, now=NOW)
+
+    assert summary == {"sessions": 1, "blobs": 3, "bytes": 2110}